@@ -20,9 +20,10 @@ def use_backend(backend):
     global _current
     if backend in AVAILABLE:
         module_ = named_module('dosna.backends.{}'.format(backend))
-        if hasattr(module_, '_backend'):
-            log.debug('Switching backend to `%s`', module_._backend.name)
-            _current = module_._backend
+        backend_ = getattr(module_, '_backend', None)
+        if backend_ is not None:
+            log.debug('Switching backend to `%s`', backend_.name)
+            _current = backend_
         else:
             raise Exception(
                 'Module `{}` is not a proper backend.'.format(backend))
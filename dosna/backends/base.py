@@ -6,7 +6,6 @@ from itertools import product
 
 import numpy as np
 
-from six.moves import range
 
 log = logging.getLogger(__name__)
 
@@ -75,6 +74,10 @@ class BackendConnection(object):
 
 class BackendDataset(object):
 
+    __slots__ = ('_connection', '_name', '_shape', '_dtype', '_fillvalue',
+                 '_chunk_grid', '_chunk_size', '_total_chunks', '_ndim',
+                 '_fill_chunk', '_np_dtype')
+
     def __init__(self, connection, name, shape, dtype, fillvalue, chunk_grid,
                  chunk_size):
         if not connection.has_dataset(name):
@@ -84,12 +87,16 @@ class BackendDataset(object):
         self._name = name
         self._shape = shape
         self._dtype = dtype
+        # dtype may arrive as a string from backend metadata; parse it
+        # once instead of on every read
+        self._np_dtype = np.dtype(dtype)
         self._fillvalue = fillvalue
 
         self._chunk_grid = chunk_grid
         self._chunk_size = chunk_size
         self._total_chunks = np.prod(chunk_grid)
         self._ndim = len(self._shape)
+        self._fill_chunk = None
 
     @property
     def connection(self):
@@ -111,6 +118,10 @@ class BackendDataset(object):
     def dtype(self):
         return self._dtype
 
+    @property
+    def np_dtype(self):
+        return self._np_dtype
+
     @property
     def fillvalue(self):
         return self._fillvalue
@@ -150,6 +161,21 @@ class BackendDataset(object):
     def get_chunk_data(self, idx, slices=None):
         return self.get_chunk(idx)[slices]
 
+    def prefetch_chunk_data(self, idx):
+        """Hint that chunk `idx` will be read soon.  Backends that pay a
+        network round-trip per chunk can start the read asynchronously;
+        the default is a no-op"""
+
+    def fill_chunk_data(self):
+        """Chunk-sized array of the fillvalue, shared across calls as a
+        read-only broadcast view of one scalar; callers that want to
+        mutate the result must copy it first"""
+        if self._fill_chunk is None:
+            self._fill_chunk = np.broadcast_to(
+                np.asarray(self.fillvalue, dtype=self.dtype),
+                tuple(self.chunk_size))
+        return self._fill_chunk
+
     def set_chunk_data(self, idx, values, slices=None):
         if not self.has_chunk(idx):
             self.create_chunk(idx, values, slices)
@@ -157,6 +183,36 @@ class BackendDataset(object):
 
     # Utility methods used by all backends and engines
 
+    def iter_chunk_indices(self):
+        """Iterate every chunk index lazily, without materializing the
+        full grid"""
+        return self._ndindex(self.chunk_grid)
+
+    def iter_chunk_indices_tiled(self, tile_bytes=2 ** 24):
+        """Iterate every chunk index in a blocked order: a tile of
+        neighbouring chunks whose payload fits in `tile_bytes` is
+        finished before moving on, so repeated passes over an in-memory
+        source array stay cache resident.  The default budget is sized
+        for a share of a typical L3 cache"""
+        chunk_bytes = int(np.prod(self.chunk_size)) * self.np_dtype.itemsize
+        budget = max(1, tile_bytes // max(1, chunk_bytes))
+        grid = tuple(int(size) for size in self.chunk_grid)
+        # grow the tile from the fastest-varying axis outwards, so the
+        # split (if any) lands on the slowest axes
+        tile = []
+        for size in reversed(grid):
+            take = min(size, budget)
+            tile.append(take)
+            budget = max(1, budget // take)
+        tile = tuple(reversed(tile))
+        nblocks = tuple(-(-size // step) for size, step in zip(grid, tile))
+        for outer in self._ndindex(nblocks):
+            base = tuple(o * step for o, step in zip(outer, tile))
+            inner_dims = tuple(min(step, size - b)
+                               for step, size, b in zip(tile, grid, base))
+            for inner in self._ndindex(inner_dims):
+                yield tuple(b + i for b, i in zip(base, inner))
+
     def _idx_from_flat(self, idx):
         return tuple(map(int, np.unravel_index(idx, self.chunk_grid)))
 
@@ -183,10 +239,14 @@ class BackendDataset(object):
 
         if len(slices) <= self.ndim:
             nmiss = self.ndim - len(slices)
-            while Ellipsis in slices:
-                idx = slices.index(Ellipsis)
-                slices = slices[:idx] + ([slice(None)] * (nmiss + 1)) \
-                    + slices[idx + 1:]
+            if Ellipsis in slices:
+                expanded = []
+                for slice_ in slices:
+                    if slice_ is Ellipsis:
+                        expanded.extend([slice(None)] * (nmiss + 1))
+                    else:
+                        expanded.append(slice_)
+                slices = expanded
             if len(slices) < self.ndim:
                 slices = list(slices) + ([slice(None)] * nmiss)
         elif len(slices) > self.ndim:
@@ -198,27 +258,22 @@ class BackendDataset(object):
         squeeze_axis = []
         for index, slice_ in enumerate(slices):
             if isinstance(slice_, int):
+                if slice_ < 0:
+                    slice_ += shape[index]
+                if slice_ < 0 or slice_ >= shape[index]:
+                    raise Exception('Only in-bounds slicing supported: `{}`'
+                                    .format(slices))
                 final_slices.append(slice(slice_, slice_ + 1))
                 squeeze_axis.append(index)
             elif isinstance(slice_, slice):
-                start = slice_.start
-                stop = slice_.stop
-                if start is None:
-                    start = 0
-                if stop is None:
-                    stop = shape[index]
-                elif stop < 0:
-                    stop = self.shape[index] + stop
-                if start < 0 or start >= self.shape[index]:
-                    raise Exception('Only possitive and '
-                                    'in-bounds slicing supported: `{}`'
-                                    .format(slices))
-                if stop < 0 or stop > self.shape[index] or stop < start:
-                    raise Exception('Only possitive and '
-                                    'in-bounds slicing supported: `{}`'
-                                    .format(slices))
                 if slice_.step is not None and slice_.step != 1:
                     raise Exception('Only slicing with step 1 supported')
+                # the builtin normalizes None and negative bounds and
+                # clamps to the axis length in one C call
+                start, stop, _ = slice_.indices(shape[index])
+                if stop < start:
+                    raise Exception('Only in-bounds slicing supported: `{}`'
+                                    .format(slices))
                 final_slices.append(slice(start, stop))
             else:
                 raise Exception('Invalid type `{}` in slicing, only integer or'
@@ -242,31 +297,26 @@ class BackendDataset(object):
         chunk_grid = self.chunk_grid
 
         for index, slc in enumerate(slices):
-            sstart = slc.start // chunk_size[index]
-            sstop = min((slc.stop - 1) // chunk_size[index],
-                        chunk_grid[index] - 1)
+            size = chunk_size[index]
+            sstart = slc.start // size
+            sstop = min((slc.stop - 1) // size, chunk_grid[index] - 1)
             if sstop < 0:
                 sstop = 0
 
-            pad_start = slc.start - sstart * chunk_size[index]
-            pad_stop = slc.stop - sstop * chunk_size[index]
-
-            _i = []  # index
-            _c = []  # chunk slices in current dimension
-            _g = []  # global slices in current dimension
-
-            for chunk_index in range(sstart, sstop + 1):
-                start = pad_start if chunk_index == sstart else 0
-                stop = pad_stop if chunk_index == sstop else chunk_size[index]
-                gchunk = chunk_index * chunk_size[index] - slc.start
-                _i += [chunk_index]
-                _c += [slice(start, stop)]
-                _g += [slice(gchunk + start, gchunk + stop)]
-
-            nchunks += [sstop - sstart + 1]
-            indexes += [_i]
-            cslices += [_c]
-            gslices += [_g]
+            # intersect every touched chunk with the slice in one
+            # vectorized pass instead of a Python loop per chunk
+            offsets = np.arange(sstart, sstop + 1) * size
+            starts = np.maximum(offsets, slc.start)
+            stops = np.minimum(offsets + size, slc.stop)
+
+            nchunks.append(sstop - sstart + 1)
+            indexes.append(list(range(sstart, sstop + 1)))
+            cslices.append([slice(start, stop) for start, stop in
+                            zip((starts - offsets).tolist(),
+                                (stops - offsets).tolist())])
+            gslices.append([slice(start, stop) for start, stop in
+                            zip((starts - slc.start).tolist(),
+                                (stops - slc.start).tolist())])
 
         return (zip(*
                     (
@@ -282,6 +332,9 @@ class BackendDataset(object):
 
 class BackendDataChunk(object):
 
+    __slots__ = ('_dataset', '_idx', '_name', '_shape', '_size', '_dtype',
+                 '_fillvalue', '_byte_count', '_np_dtype')
+
     def __init__(self, dataset, idx, name, shape, dtype, fillvalue):
         self._dataset = dataset
         self._idx = idx
@@ -289,8 +342,9 @@ class BackendDataChunk(object):
         self._shape = shape
         self._size = np.prod(shape)
         self._dtype = dtype
+        self._np_dtype = np.dtype(dtype)
         self._fillvalue = fillvalue
-        self._byte_count = self.size * np.dtype(self.dtype).itemsize
+        self._byte_count = self.size * self._np_dtype.itemsize
 
     @property
     def dataset(self):
@@ -312,6 +366,10 @@ class BackendDataChunk(object):
     def dtype(self):
         return self._dtype
 
+    @property
+    def np_dtype(self):
+        return self._np_dtype
+
     @property
     def fillvalue(self):
         return self._fillvalue
@@ -10,11 +10,17 @@ from dosna.backends import Backend
 from dosna.backends.base import (BackendConnection, BackendDataChunk,
                                  BackendDataset, ConnectionError,
                                  DatasetNotFoundError)
-from dosna.util import dtype2str, shape2str, str2shape
-from dosna.util.data import slices2shape
+from dosna.util import ceildiv, dtype2str, shape2str, str2shape
+from dosna.util.data import (contiguous_slice_range, fill_array,
+                             slices2shape)
 
 _SIGNATURE = "DosNa Dataset"
 
+# chunks smaller than this are packed together into shared rados
+# objects so per-object metadata and round-trip overhead is paid once
+# per stripe instead of once per chunk
+_TARGET_OBJECT_BYTES = 4 * 2 ** 20
+
 log = logging.getLogger(__name__)
 
 
@@ -57,7 +63,8 @@ class CephConnection(BackendConnection):
         return self._ioctx
 
     def create_dataset(self, name, shape=None, dtype=np.float32, fillvalue=0,
-                       data=None, chunk_size=None):
+                       data=None, chunk_size=None, storage_dtype=None,
+                       scale=1, zero_point=0):
         if not ((shape is not None and dtype is not None) or data is not None):
             raise Exception('Provide `shape` and `dtype` or `data`')
         if self.has_dataset(name):
@@ -70,11 +77,28 @@ class CephConnection(BackendConnection):
         if chunk_size is None:
             chunk_size = shape
 
-        chunk_grid = (np.ceil(np.asarray(shape, float) / chunk_size))\
-            .astype(int)
+        chunk_grid = ceildiv(shape, chunk_size)
+
+        # chunks are stored as `storage_dtype` on the wire and on disk;
+        # defaults to the user-visible dtype (no quantization)
+        stored_dtype = storage_dtype if storage_dtype is not None else dtype
+
+        # packing only works when unwritten slots read back as fill
+        # data: rados zero-extends sparse regions, so the *stored*
+        # encoding of the fillvalue must be exactly zero.  For
+        # quantized storage raw zeros dequantize to zero_point, so the
+        # affine offset has to be zero as well
+        chunk_bytes = int(np.prod(chunk_size)) \
+            * np.dtype(stored_dtype).itemsize
+        if fillvalue == 0 and zero_point == 0 \
+                and chunk_bytes < _TARGET_OBJECT_BYTES:
+            super_k = max(1, _TARGET_OBJECT_BYTES // chunk_bytes)
+        else:
+            super_k = 1
 
         log.debug('creating dataset %s with shape:%s chunk_size:%s '
-                  'chunk_grid:%s', name, shape, chunk_size, chunk_grid)
+                  'chunk_grid:%s super_k:%s', name, shape, chunk_size,
+                  chunk_grid, super_k)
 
         self.ioctx.write(name, _SIGNATURE)
         self.ioctx.set_xattr(name, 'shape', shape2str(shape))
@@ -82,9 +106,17 @@ class CephConnection(BackendConnection):
         self.ioctx.set_xattr(name, 'fillvalue', repr(fillvalue))
         self.ioctx.set_xattr(name, 'chunk_grid', shape2str(chunk_grid))
         self.ioctx.set_xattr(name, 'chunk_size', shape2str(chunk_size))
+        self.ioctx.set_xattr(name, 'super_k', str(super_k))
+        if storage_dtype is not None:
+            self.ioctx.set_xattr(name, 'storage_dtype',
+                                 dtype2str(storage_dtype))
+            self.ioctx.set_xattr(name, 'scale', repr(scale))
+            self.ioctx.set_xattr(name, 'zero_point', repr(zero_point))
 
         dataset = CephDataset(self, name, shape, dtype, fillvalue,
-                              chunk_grid, chunk_size)
+                              chunk_grid, chunk_size, super_k=super_k,
+                              storage_dtype=storage_dtype, scale=scale,
+                              zero_point=zero_point)
 
         return dataset
 
@@ -96,8 +128,24 @@ class CephConnection(BackendConnection):
         fillvalue = int(self.ioctx.get_xattr(name, 'fillvalue'))
         chunk_grid = str2shape(self.ioctx.get_xattr(name, 'chunk_grid'))
         chunk_size = str2shape(self.ioctx.get_xattr(name, 'chunk_size'))
+        try:
+            super_k = int(self.ioctx.get_xattr(name, 'super_k'))
+        except rados.NoData:
+            # datasets written before chunk packing use one object per
+            # chunk
+            super_k = 1
+        try:
+            storage_dtype = self.ioctx.get_xattr(name, 'storage_dtype')
+            scale = float(self.ioctx.get_xattr(name, 'scale'))
+            zero_point = float(self.ioctx.get_xattr(name, 'zero_point'))
+        except rados.NoData:
+            storage_dtype = None
+            scale = 1
+            zero_point = 0
         dataset = CephDataset(self, name, shape, dtype, fillvalue,
-                              chunk_grid, chunk_size)
+                              chunk_grid, chunk_size, super_k=super_k,
+                              storage_dtype=storage_dtype, scale=scale,
+                              zero_point=zero_point)
         return dataset
 
     def has_dataset(self, name):
@@ -110,11 +158,31 @@ class CephConnection(BackendConnection):
 
     def del_dataset(self, name):
         log.debug("Removing dataset %s", name)
-        if self.has_dataset(name):
-            self.ioctx.remove_object(name)
-        else:
+        if not self.has_dataset(name):
             raise DatasetNotFoundError(
                 'Dataset `{}` does not exist'.format(name))
+        # derive the chunk and stripe object names from the dataset's
+        # own metadata; listing the pool would cost a pass over every
+        # object in it and a bare prefix match could hit other datasets
+        chunk_grid = str2shape(self.ioctx.get_xattr(name, 'chunk_grid'))
+        try:
+            super_k = int(self.ioctx.get_xattr(name, 'super_k'))
+        except rados.NoData:
+            super_k = 1
+        if super_k > 1:
+            stripes = int(ceildiv(int(np.prod(chunk_grid)), super_k))
+            names = ('{}/s{}'.format(name, stripe)
+                     for stripe in range(stripes))
+        else:
+            names = ('{}/{}'.format(name, '.'.join(map(str, idx)))
+                     for idx in np.ndindex(*chunk_grid))
+        for obj_name in names:
+            try:
+                self.ioctx.remove_object(obj_name)
+            except rados.ObjectNotFound:
+                # unwritten chunks have no object
+                pass
+        self.ioctx.remove_object(name)
 
 
 class CephDataset(BackendDataset):
@@ -122,82 +190,340 @@ class CephDataset(BackendDataset):
     CephDataset wraps an instance of Rados.Object
     """
 
+    def __init__(self, *args, **kwargs):
+        super_k = kwargs.pop('super_k', 1)
+        storage_dtype = kwargs.pop('storage_dtype', None)
+        scale = kwargs.pop('scale', 1)
+        zero_point = kwargs.pop('zero_point', 0)
+        super(CephDataset, self).__init__(*args, **kwargs)
+        # chunks may be stored quantized to a narrower dtype; get_data
+        # dequantizes back to the user-visible dtype
+        if storage_dtype is not None:
+            self._storage_dtype = np.dtype(storage_dtype)
+        else:
+            self._storage_dtype = self.np_dtype
+        self._quantized = self._storage_dtype != self.np_dtype
+        self._scale = scale
+        self._zero_point = zero_point
+        # number of adjacent chunks packed into one rados object
+        self._super_k = super_k
+        self._chunk_bytes = int(np.prod(self.chunk_size)) \
+            * self._storage_dtype.itemsize
+        # objects known to exist; avoids a rados stat round-trip per
+        # chunk access once a chunk has been seen or created
+        self._chunk_exists = set()
+        # live slots per packed object, cached from each stripe's slot
+        # bitmap xattr; the stripe object outlives its slots, so its
+        # extent alone cannot tell a written chunk from a deleted one
+        self._stripe_slots = {}
+        self._chunk_names = {}
+        # in-flight aio_read requests fired by prefetch_chunk_data,
+        # keyed by chunk index and consumed by get_chunk_data
+        self._prefetched = {}
+
     @property
     def ioctx(self):
         return self.connection.ioctx
 
+    def _chunk_location(self, idx):
+        """Name of the rados object holding chunk `idx` and the byte
+        offset of the chunk inside it"""
+        idx = tuple(idx)
+        location = self._chunk_names.get(idx)
+        if location is None:
+            if self._super_k > 1:
+                lin = int(np.ravel_multi_index(idx, self.chunk_grid))
+                stripe, slot = divmod(lin, self._super_k)
+                location = ('{}/s{}'.format(self.name, stripe),
+                            slot * self._chunk_bytes)
+            else:
+                location = ('{}/{}'.format(self.name,
+                                           '.'.join(map(str, idx))), 0)
+            self._chunk_names[idx] = location
+        return location
+
     def _idx2name(self, idx):
-        return '{}/{}'.format(self.name, '.'.join(map(str, idx)))
+        return self._chunk_location(idx)[0]
+
+    def _stripe_written_slots(self, name):
+        """Slots of the packed object `name` holding live chunks,
+        loaded from the stripe's slot bitmap xattr on first access so
+        create/delete state survives reopening the dataset"""
+        slots = self._stripe_slots.get(name)
+        if slots is None:
+            try:
+                mask = bytearray(self.ioctx.get_xattr(name, 'slots'))
+            except (rados.ObjectNotFound, rados.NoData):
+                mask = bytearray()
+            slots = set()
+            for byte_index, byte in enumerate(mask):
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        slots.add(byte_index * 8 + bit)
+            self._stripe_slots[name] = slots
+        return slots
+
+    def _save_stripe_slots(self, name, slots):
+        mask = bytearray((self._super_k + 7) // 8)
+        for slot in slots:
+            mask[slot // 8] |= 1 << (slot % 8)
+        self.ioctx.set_xattr(name, 'slots', bytes(mask))
+
+    def _bytes2chunk(self, data):
+        """View `data` as one chunk, zero-padding short reads from the
+        sparse tail of a packed object and dequantizing if the dataset
+        stores a narrower dtype"""
+        count = int(np.prod(self.chunk_size))
+        if len(data) < self._chunk_bytes:
+            chunk = np.zeros(count, self._storage_dtype)
+            read = len(data) // self._storage_dtype.itemsize
+            chunk[:read] = np.frombuffer(data, dtype=self._storage_dtype,
+                                         count=read)
+        else:
+            chunk = np.frombuffer(data, dtype=self._storage_dtype,
+                                  count=count)
+        return self._dequantize(chunk).reshape(self.chunk_size)
+
+    def _dequantize(self, data):
+        if not self._quantized:
+            return data
+        return data.astype(self.dtype) * self._scale + self._zero_point
+
+    def _quantize(self, values):
+        values = np.asarray(values)
+        if not self._quantized:
+            return values.astype(self.dtype, copy=False)
+        quantized = (values - self._zero_point) / self._scale
+        if np.issubdtype(self._storage_dtype, np.integer):
+            info = np.iinfo(self._storage_dtype)
+            quantized = np.clip(np.rint(quantized), info.min, info.max)
+        return quantized.astype(self._storage_dtype)
 
     def create_chunk(self, idx, data=None, slices=None):
         if self.has_chunk(idx):
             raise Exception('DataChunk `{}{}` already exists'.format(self.name,
                                                                      idx))
-        name = self._idx2name(idx)
+        name, offset = self._chunk_location(idx)
         dtype = self.dtype
         shape = self.chunk_size
         fillvalue = self.fillvalue
-        datachunk = CephDataChunk(self, idx, name, shape, dtype, fillvalue)
+        datachunk = CephDataChunk(self, idx, name, shape, dtype, fillvalue,
+                                  offset=offset)
         if data is None:
-            data = np.full(shape, fillvalue, dtype)
+            # shared read-only view; set_data only serializes it
+            data = self.fill_chunk_data()
         datachunk.set_data(data, slices, fill_others=True)
+        if self._super_k > 1:
+            slots = self._stripe_written_slots(name)
+            slots.add(offset // self._chunk_bytes)
+            self._save_stripe_slots(name, slots)
+        self._chunk_exists.add(tuple(idx))
         return datachunk
 
     def get_chunk(self, idx):
         if self.has_chunk(idx):
-            name = self._idx2name(idx)
+            name, offset = self._chunk_location(idx)
             dtype = self.dtype
             shape = self.chunk_size
             fillvalue = self.fillvalue
-            return CephDataChunk(self, idx, name, shape, dtype, fillvalue)
+            return CephDataChunk(self, idx, name, shape, dtype, fillvalue,
+                                 offset=offset)
         return self.create_chunk(idx)
 
     def has_chunk(self, idx):
-        name = self._idx2name(idx)
-        try:
-            self.ioctx.stat(name)
-        except rados.ObjectNotFound:
-            return False
+        idx = tuple(idx)
+        if idx in self._chunk_exists:
+            return True
+        name, offset = self._chunk_location(idx)
+        if self._super_k > 1:
+            # the object extent cannot tell a written slot from the
+            # zero-extension below a later one, and a deleted slot
+            # lingers as zeros; the persisted bitmap is authoritative
+            if offset // self._chunk_bytes \
+                    not in self._stripe_written_slots(name):
+                return False
+        else:
+            try:
+                self.ioctx.stat(name)
+            except rados.ObjectNotFound:
+                return False
+        self._chunk_exists.add(idx)
         return True
 
     def del_chunk(self, idx):
         if self.has_chunk(idx):
-            self.ioctx.remove_object(self._idx2name(idx))
+            idx = tuple(idx)
+            self._chunk_exists.discard(idx)
+            self._prefetched.pop(idx, None)
+            name, offset = self._chunk_location(idx)
+            if self._super_k > 1:
+                slots = self._stripe_written_slots(name)
+                slots.discard(offset // self._chunk_bytes)
+                if slots:
+                    # slots of a packed object cannot be removed one
+                    # by one; overwrite with fill data (zeros) and
+                    # clear the slot's bit so has_chunk stops
+                    # reporting it
+                    self.ioctx.write(name, b'\0' * self._chunk_bytes,
+                                     offset=offset)
+                    self._save_stripe_slots(name, slots)
+                else:
+                    # the last live slot of this stripe is gone, drop
+                    # the object instead of keeping a block of zeros
+                    self.ioctx.remove_object(name)
+                    self._stripe_slots.pop(name, None)
+            else:
+                self.ioctx.remove_object(name)
             return True
         return False
 
+    def prefetch_chunk_data(self, idx):
+        idx = tuple(idx)
+        if idx in self._prefetched or not self.has_chunk(idx):
+            return
+        result = {}
+
+        def _oncomplete(completion, data):
+            result['data'] = data
+
+        name, offset = self._chunk_location(idx)
+        completion = self.ioctx.aio_read(name, self._chunk_bytes, offset,
+                                         _oncomplete)
+        self._prefetched[idx] = (completion, result)
+
+    def get_chunk_data(self, idx, slices=None):
+        entry = self._prefetched.pop(tuple(idx), None)
+        if entry is None:
+            return super(CephDataset, self).get_chunk_data(idx, slices)
+        completion, result = entry
+        completion.wait_for_complete_and_cb()
+        data = self._bytes2chunk(result['data'])
+        if slices is None:
+            return data
+        return data[slices]
+
+    def read_into(self, out, slices):
+        """Copy `slices` of the dataset into the caller-provided `out`
+        buffer, submitting every chunk read up-front through librados
+        AIO instead of paying one blocking round-trip per chunk"""
+        # materialize the chunk list first: the iterator yields indices
+        # in sorted C order, so the stored ones form back-to-back runs
+        # of consecutive objects when submitted together, and missing
+        # chunks are settled without touching the wire at all
+        stored = []
+        for idx, cslice, gslice in self._chunk_slice_iterator(slices,
+                                                              self.ndim):
+            if self.has_chunk(idx):
+                stored.append((idx, cslice, gslice))
+            else:
+                out[gslice] = self.fillvalue
+
+        completions = []
+        for idx, cslice, gslice in stored:
+            def _oncomplete(completion, data, cslice=cslice, gslice=gslice):
+                out[gslice] = self._bytes2chunk(data)[cslice]
+
+            name, offset = self._chunk_location(idx)
+            completions.append(
+                self.ioctx.aio_read(name, self._chunk_bytes, offset,
+                                    _oncomplete))
+        for completion in completions:
+            completion.wait_for_complete_and_cb()
+        return out
+
+    def __getitem__(self, slices):
+        slices = self._process_slices(slices)
+        tshape = tuple(x.stop - x.start for x in slices)
+        return self.read_into(np.empty(tshape, dtype=self.dtype), slices)
+
 
 class CephDataChunk(BackendDataChunk):
 
+    def __init__(self, dataset, idx, name, shape, dtype, fillvalue,
+                 offset=0):
+        super(CephDataChunk, self).__init__(dataset, idx, name, shape,
+                                            dtype, fillvalue)
+        # byte offset of this chunk inside its (possibly shared) object
+        self._offset = offset
+
     @property
     def ioctx(self):
         return self.dataset.ioctx
 
+    @property
+    def storage_dtype(self):
+        return self.dataset._storage_dtype
+
     def get_data(self, slices=None):
         if slices is None:
             slices = slice(None)
-        data = np.fromstring(self.read(), dtype=self.dtype, count=self.size)
-        data.shape = self.shape
+        elif isinstance(slices, tuple):
+            # a contiguous run can be fetched with a ranged read instead
+            # of pulling the whole chunk and discarding most of it
+            span = contiguous_slice_range(slices, self.shape)
+            if span is not None:
+                start, count, tshape = span
+                itemsize = self.storage_dtype.itemsize
+                data = np.frombuffer(self.read(length=count * itemsize,
+                                               offset=start * itemsize),
+                                     dtype=self.storage_dtype, count=count)
+                return self.dataset._dequantize(data).reshape(tshape)
+        data = np.frombuffer(self.read(), dtype=self.storage_dtype,
+                             count=self.size)
+        data = self.dataset._dequantize(data).reshape(self.shape)
         return data[slices]
 
     def set_data(self, values, slices=None, fill_others=False):
         if slices is None or slices2shape(slices) == self.shape:
-            self.write_full(values.tobytes())
+            # scalars must be expanded to the chunk shape first,
+            # otherwise only a single element would be serialized
+            values = np.broadcast_to(values, self.shape)
+            self.write_full(self.dataset._quantize(values).tobytes())
         else:
+            if not fill_others and isinstance(slices, tuple):
+                span = contiguous_slice_range(slices, self.shape)
+                if span is not None:
+                    # a contiguous run can be patched in place with a
+                    # ranged write, skipping the read-modify-write
+                    # round-trip entirely
+                    start, count, tshape = span
+                    values = np.broadcast_to(values, tshape)
+                    values = self.dataset._quantize(
+                        np.ascontiguousarray(values, dtype=self.dtype))
+                    itemsize = self.storage_dtype.itemsize
+                    self.write(np.ascontiguousarray(values).tobytes(),
+                               offset=start * itemsize)
+                    return
             if fill_others:
-                cdata = np.full(self.shape, self.fillvalue, self.dtype)
+                cdata = fill_array(self.shape, self.fillvalue, self.dtype)
             else:
-                cdata = self.get_data()
+                # frombuffer views are read-only, copy before patching
+                cdata = self.get_data().copy()
             cdata[slices] = values
-            self.write_full(cdata.tobytes())
+            self.write_full(self.dataset._quantize(cdata).tobytes())
 
     def write_full(self, data):
-        self.ioctx.write_full(self.name, data)
+        if self.dataset._super_k > 1:
+            # write_full would truncate the other slots of the shared
+            # object; a ranged write touches only this chunk
+            self.ioctx.write(self.name, data, offset=self._offset)
+        else:
+            self.ioctx.write_full(self.name, data)
+
+    def write(self, data, offset=0):
+        self.ioctx.write(self.name, data, offset=self._offset + offset)
 
     def read(self, length=None, offset=0):
         if length is None:
-            length = self.byte_count
-        return self.ioctx.read(self.name, length=length, offset=offset)
+            # sized for the stored (possibly quantized) dtype
+            length = self.dataset._chunk_bytes
+        data = self.ioctx.read(self.name, length=length,
+                               offset=self._offset + offset)
+        if len(data) < length:
+            # reads past the written end of a packed object come back
+            # short; the missing tail is fill data (zeros)
+            data += b'\0' * (length - len(data))
+        return data
 
 
 _backend = Backend('ceph', CephConnection, CephDataset, CephDataChunk)
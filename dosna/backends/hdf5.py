@@ -11,7 +11,7 @@ import numpy as np
 from dosna.backends import Backend
 from dosna.backends.base import (BackendConnection, BackendDataChunk,
                                  BackendDataset, DatasetNotFoundError)
-from dosna.util import DirectoryTreeMixin, dtype2str
+from dosna.util import DirectoryTreeMixin, ceildiv, dtype2str
 
 _DATASET_METADATA_FILENAME = 'dataset.h5'
 log = logging.getLogger(__name__)
@@ -59,8 +59,7 @@ class H5Connection(BackendConnection, DirectoryTreeMixin):
         if chunk_size is None:
             chunk_size = shape
 
-        chunk_grid = (np.ceil(np.asarray(shape, float) / chunk_size))\
-            .astype(int)
+        chunk_grid = ceildiv(shape, chunk_size)
 
         path = self.relpath(name)
         os.mkdir(path)
@@ -114,11 +113,20 @@ class H5Dataset(BackendDataset, DirectoryTreeMixin):
         super(H5Dataset, self).__init__(*args, **kwargs)
         self.parent = self.connection
         self._subchunks = kwargs.pop('subchunks', None)
+        self._chunk_names = {}
 
     def _idx2name(self, idx):
-        if not all([isinstance(i, int) for i in idx]) or len(idx) != self.ndim:
-            raise Exception('Invalid chunk idx')
-        return 'chunk_{}.h5'.format('_'.join(map(str, idx)))
+        # validate and format each index once; has_chunk/get_chunk pairs
+        # would otherwise redo the string work on every access
+        idx = tuple(idx)
+        name = self._chunk_names.get(idx)
+        if name is None:
+            if not all(isinstance(i, int) for i in idx) \
+                    or len(idx) != self.ndim:
+                raise Exception('Invalid chunk idx')
+            name = 'chunk_{}.h5'.format('_'.join(map(str, idx)))
+            self._chunk_names[idx] = name
+        return name
 
     def create_chunk(self, idx, data=None, slices=None):
         if self.has_chunk(idx):
@@ -8,6 +8,7 @@ import numpy as np
 from dosna.backends import Backend
 from dosna.backends.base import (BackendConnection, BackendDataChunk,
                                  BackendDataset, DatasetNotFoundError)
+from dosna.util import ceildiv
 
 log = logging.getLogger(__name__)
 
@@ -36,8 +37,7 @@ class MemConnection(BackendConnection):
         if chunk_size is None:
             chunk_size = shape
 
-        chunk_grid = (np.ceil(np.asarray(shape, float) / chunk_size))\
-            .astype(int)
+        chunk_grid = ceildiv(shape, chunk_size)
 
         log.debug('Creating Dataset `%s`', name)
         self.datasets[name] = None  # Key `name` has to exist
@@ -47,76 +47,141 @@ class MemConnection(BackendConnection):
         return dataset
 
     def get_dataset(self, name):
-        if not self.has_dataset(name):
+        try:
+            return self.datasets[name]
+        except KeyError:
             raise DatasetNotFoundError('Dataset `%s` does not exist' % name)
-        return self.datasets[name]
 
     def has_dataset(self, name):
         return name in self.datasets
 
     def del_dataset(self, name):
-        if not self.has_dataset(name):
+        if self.datasets.pop(name, None) is None:
             raise DatasetNotFoundError('Dataset `%s` does not exist' % name)
         log.debug('Removing Dataset `%s`', name)
-        del self.datasets[name]
 
 
 class MemDataset(BackendDataset):
 
+    __slots__ = ('data_chunks', '_chunk_strides', '_chunk_slices',
+                 '_backing', '_single_chunk')
+
     def __init__(self, pool, name, shape, dtype, fillvalue, chunk_grid,
                  chunk_size):
         super(MemDataset, self).__init__(pool, name, shape, dtype, fillvalue,
                                          chunk_grid, chunk_size)
         self.data_chunks = {}
-        self._populate_chunks()
+        strides = []
+        stride = 1
+        for size in reversed(tuple(chunk_grid)):
+            strides.append(stride)
+            stride *= int(size)
+        self._chunk_strides = tuple(reversed(strides))
+        # `chunk_size is None` (the default) means a single chunk that
+        # covers the whole dataset; its key is always 0
+        self._single_chunk = stride == 1
+        # One contiguous buffer backs every chunk; with fillvalue 0 the
+        # calloc-backed pages stay virtual until they are first written
+        padded_shape = tuple(int(g) * int(c)
+                             for g, c in zip(chunk_grid, chunk_size))
+        if fillvalue == 0:
+            self._backing = np.zeros(padded_shape, dtype)
+        else:
+            self._backing = np.full(padded_shape, fillvalue, dtype)
+        self._chunk_slices = {}
+
+    def _chunk_view(self, idx):
+        # the tuple of slices for a chunk never changes, build it once
+        key = self._chunk_key(idx)
+        slices = self._chunk_slices.get(key)
+        if slices is None:
+            slices = tuple(slice(i * c, (i + 1) * c)
+                           for i, c in zip(idx, self.chunk_size))
+            self._chunk_slices[key] = slices
+        return self._backing[slices]
+
+    def _chunk_key(self, idx):
+        if self._single_chunk:
+            return 0
+        # flat C-order index; int keys hash faster than tuples
+        return int(sum(i * s for i, s in zip(idx, self._chunk_strides)))
 
     def _populate_chunks(self):
-        for idx in np.ndindex(*self.chunk_grid):
+        # Chunks are allocated lazily by `get_chunk`; this remains only
+        # for callers that explicitly want every chunk materialized.
+        for idx in self.iter_chunk_indices():
             self.create_chunk(idx)
 
     def create_chunk(self, idx, data=None, slices=None):
-        if self.has_chunk(idx):
+        key = self._chunk_key(idx)
+        if key in self.data_chunks:
             raise Exception('DataChunk `{}{}` already exists'.format(self.name,
                                                                      idx))
 
-        self.data_chunks[idx] = None
-
         chunk = MemDataChunk(self, idx, 'Chunk {}'.format(idx),
-                             self.chunk_size, self.dtype, self.fillvalue)
+                             self.chunk_size, self.dtype, self.fillvalue,
+                             self._chunk_view(idx))
         if data is not None:
             slices = slices or slice(None)
             chunk.set_data(data, slices=slices)
 
-        self.data_chunks[idx] = chunk
+        self.data_chunks[key] = chunk
         return chunk
 
     def get_chunk(self, idx):
-        if self.has_chunk(idx):
-            return self.data_chunks[idx]
-        return self.create_chunk(idx)
+        chunk = self.data_chunks.get(self._chunk_key(idx))
+        if chunk is None:
+            return self.create_chunk(idx)
+        return chunk
 
     def has_chunk(self, idx):
-        return idx in self.data_chunks
+        return self._chunk_key(idx) in self.data_chunks
 
     def del_chunk(self, idx):
-        if self.has_chunk(idx):
-            del self.data_chunks[idx]
-            return True
-        return False
+        chunk = self.data_chunks.pop(self._chunk_key(idx), None)
+        if chunk is None:
+            return False
+        # the region keeps living in the backing array, reset it so
+        # a future access sees fill data again
+        chunk.data[...] = self.fillvalue
+        return True
+
+    def read_into(self, out, slices):
+        """Copy `slices` of the dataset straight into the caller-provided
+        `out` buffer, one copy per intersecting chunk"""
+        for idx, cslice, gslice in self._chunk_slice_iterator(slices,
+                                                              self.ndim):
+            np.copyto(out[gslice], self.get_chunk(idx).get_data(cslice))
+        return out
+
+    def __getitem__(self, slices):
+        # bulk read: allocate the final buffer once and fill it in place;
+        # integer indices keep their axis (no squeezing at this level)
+        slices = self._process_slices(slices)
+        tshape = tuple(x.stop - x.start for x in slices)
+        return self.read_into(np.empty(tshape, dtype=self.dtype), slices)
 
 
 class MemDataChunk(BackendDataChunk):
 
-    def __init__(self, dataset, idx, name, shape, dtype, fillvalue):
+    __slots__ = ('data',)
+
+    def __init__(self, dataset, idx, name, shape, dtype, fillvalue, data):
         super(MemDataChunk, self).__init__(dataset, idx, name, shape,
                                            dtype, fillvalue)
-        self.data = np.full(shape, fillvalue, dtype)
+        self.data = data
 
     def get_data(self, slices=None):
+        if slices is None:
+            # `data[None]` would prepend an axis, not read everything
+            return self.data
         return self.data[slices]
 
     def set_data(self, values, slices=None):
-        self.data[slices] = values
+        if slices is None:
+            np.copyto(self.data, values)
+        else:
+            self.data[slices] = values
 
 
 _backend = Backend('ram', MemConnection, MemDataset, MemDataChunk)
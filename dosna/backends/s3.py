@@ -11,8 +11,8 @@ from dosna.backends import Backend
 from dosna.backends.base import (BackendConnection, BackendDataChunk,
                                  BackendDataset, ConnectionError,
                                  DatasetNotFoundError)
-from dosna.util import dtype2str, shape2str, str2shape
-from dosna.util.data import slices2shape
+from dosna.util import ceildiv, dtype2str, shape2str, str2shape
+from dosna.util.data import fill_array, slices2shape
 
 _DATASET_ROOT = 'dataset_root'
 _SIGNATURE = "DosNa Dataset"
@@ -90,8 +90,7 @@ class S3Connection(BackendConnection):
         if chunk_size is None:
             chunk_size = shape
 
-        chunk_grid = (np.ceil(np.asarray(shape, float) / chunk_size))\
-            .astype(int)
+        chunk_grid = ceildiv(shape, chunk_size)
 
         name = bucketName(name)
 
@@ -197,12 +196,22 @@ class S3Dataset(BackendDataset):
     S3Dataset
     """
 
+    def __init__(self, *args, **kwargs):
+        super(S3Dataset, self).__init__(*args, **kwargs)
+        self._chunk_names = {}
+
     @property
     def client(self):
         return self.connection.client
 
     def _idx2name(self, idx):
-        return '.'.join(map(str, idx))
+        # format each object key once; repeated accesses reuse it
+        idx = tuple(idx)
+        name = self._chunk_names.get(idx)
+        if name is None:
+            name = '.'.join(map(str, idx))
+            self._chunk_names[idx] = name
+        return name
 
     def create_chunk(self, idx, data=None, slices=None):
         if self.has_chunk(idx):
@@ -215,7 +224,8 @@ class S3Dataset(BackendDataset):
         fillvalue = self.fillvalue
         datachunk = S3DataChunk(self, idx, name, shape, dtype, fillvalue)
         if data is None:
-            data = np.full(shape, fillvalue, dtype)
+            # shared read-only view; set_data only serializes it
+            data = self.fill_chunk_data()
         datachunk.set_data(data, slices, fill_others=True)
         return datachunk
 
@@ -259,20 +269,26 @@ class S3DataChunk(BackendDataChunk):
     def get_data(self, slices=None):
         if slices is None:
             slices = slice(None)
-        data = np.fromstring(self.read(), dtype=self.dtype, count=self.size)
-        data.shape = self.shape
+        data = np.frombuffer(self.read(), dtype=self.np_dtype,
+                             count=self.size).reshape(self.shape)
         return data[slices]
 
     def set_data(self, values, slices=None, fill_others=False):
         if slices is None or slices2shape(slices) == self.shape:
-            self.write_full(values.tobytes())
+            # scalars must be expanded to the chunk shape first,
+            # otherwise the object body would hold a single element
+            values = np.ascontiguousarray(np.broadcast_to(values, self.shape),
+                                          dtype=self.dtype)
+            # buffer-protocol view avoids copying the chunk into bytes
+            self.write_full(memoryview(values).cast('B'))
         else:
             if fill_others:
-                cdata = np.full(self.shape, self.fillvalue, self.dtype)
+                cdata = fill_array(self.shape, self.fillvalue, self.dtype)
             else:
-                cdata = self.get_data()
+                # frombuffer views are read-only, copy before patching
+                cdata = self.get_data().copy()
             cdata[slices] = values
-            self.write_full(cdata.tobytes())
+            self.write_full(memoryview(np.ascontiguousarray(cdata)).cast('B'))
 
     def write_full(self, data):
 
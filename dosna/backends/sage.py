@@ -9,8 +9,8 @@ from dosna.backends import Backend
 from dosna.backends.base import (BackendConnection, BackendDataChunk,
                                  BackendDataset, ConnectionError,
                                  DatasetNotFoundError)
-from dosna.util import dtype2str, shape2str, str2shape
-from dosna.util.data import slices2shape
+from dosna.util import ceildiv, dtype2str, shape2str, str2shape
+from dosna.util.data import fill_array, slices2shape
 
 try:
     from dosna.support.pyclovis import Clovis
@@ -76,8 +76,7 @@ class SageConnection(BackendConnection):
         if chunk_size is None:
             chunk_size = shape
 
-        chunk_grid = (np.ceil(np.asarray(shape, float) / chunk_size))\
-            .astype(int)
+        chunk_grid = ceildiv(shape, chunk_size)
 
         log.debug('creating dataset %s with shape:%s chunk_size:%s '
                   'chunk_grid:%s', name, shape, chunk_size, chunk_grid)
@@ -116,9 +115,19 @@ class SageConnection(BackendConnection):
 
 
 class SageDataset(BackendDataset):
+    def __init__(self, *args, **kwargs):
+        super(SageDataset, self).__init__(*args, **kwargs)
+        self._chunk_names = {}
+
     def _idx2name(self, idx):
-        # this should be an integer for this backend
-        return np.ravel_multi_index(idx, self.chunk_grid)
+        # this should be an integer for this backend; ravel_multi_index
+        # is costly per call, so remember the result per chunk
+        idx = tuple(idx)
+        name = self._chunk_names.get(idx)
+        if name is None:
+            name = int(np.ravel_multi_index(idx, self.chunk_grid))
+            self._chunk_names[idx] = name
+        return name
 
     def create_chunk(self, idx, data=None, slices=None):
         if self.has_chunk(idx):
@@ -133,7 +142,8 @@ class SageDataset(BackendDataset):
         self.connection.clovis.create_object_chunk(self.name, name)
         datachunk = SageDataChunk(self, idx, name, shape, dtype, fillvalue)
         if data is None:
-            data = np.full(shape, fillvalue, dtype)
+            # shared read-only view; set_data only serializes it
+            data = self.fill_chunk_data()
         datachunk.set_data(data, slices, fill_others=True)
         return datachunk
 
@@ -170,17 +180,18 @@ class SageDataChunk(BackendDataChunk):
             self.write(values.tobytes())
         else:
             if fill_others:
-                cdata = np.full(self.shape, self.fillvalue, self.dtype)
+                cdata = fill_array(self.shape, self.fillvalue, self.dtype)
             else:
-                cdata = self.get_data()
+                # frombuffer views are read-only, copy before patching
+                cdata = self.get_data().copy()
             cdata[slices] = values
             self.write(cdata.tobytes())
 
     def get_data(self, slices=None):
         if slices is None:
             slices = slice(None)
-        data = np.fromstring(self.read(), dtype=self.dtype, count=self.size)
-        data.shape = self.shape
+        data = np.frombuffer(self.read(), dtype=self.np_dtype,
+                             count=self.size).reshape(self.shape)
         return data[slices]
 
     def write(self, data):
@@ -21,9 +21,10 @@ def use_engine(engine, **kwargs):
     global _current
     if engine in AVAILABLE:
         module_ = named_module('dosna.engines.%s' % engine)
-        if hasattr(module_, '_engine'):
-            log.debug('Switching engine to `%s`', module_._engine.name)
-            _current = module_._engine
+        engine_ = getattr(module_, '_engine', None)
+        if engine_ is not None:
+            log.debug('Switching engine to `%s`', engine_.name)
+            _current = engine_
             _current.params.update(kwargs)
         else:
             raise Exception('Module `%s` is not a proper engine.' % engine)
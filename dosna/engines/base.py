@@ -34,9 +34,11 @@ class BackendWrapper(object):
 class EngineConnection(BackendWrapper):
 
     def create_dataset(self, name, shape=None, dtype=np.float32, fillvalue=0,
-                       data=None, chunk_size=None):
+                       data=None, chunk_size=None, **kwargs):
+        # backend-specific options (e.g. quantized storage on ceph) are
+        # passed straight through to the wrapped connection
         self.instance.create_dataset(name, shape, dtype, fillvalue,
-                                     data, chunk_size)
+                                     data, chunk_size, **kwargs)
         dataset = self.get_dataset(name)
         if data is not None:
             dataset.load(data)
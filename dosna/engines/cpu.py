@@ -1,13 +1,13 @@
 #!/usr/bin/env python
 """cpu """
 import logging
+from collections import deque
 
 import numpy as np
 
 from dosna.backends import get_backend
 from dosna.engines import Engine
 from dosna.engines.base import EngineConnection, EngineDataChunk, EngineDataset
-from six.moves import range
 
 log = logging.getLogger(__name__)
 
@@ -24,9 +24,9 @@ class CpuConnection(EngineConnection):
         return CpuDataset(dataset)
 
     def create_dataset(self, name, shape=None, dtype=np.float32, fillvalue=0,
-                       data=None, chunk_size=None):
+                       data=None, chunk_size=None, **kwargs):
         dataset = self.instance.create_dataset(name, shape, dtype, fillvalue,
-                                               data, chunk_size)
+                                               data, chunk_size, **kwargs)
         engine_dataset = CpuDataset(dataset)
         if data is not None:
             engine_dataset.load(data)
@@ -35,6 +35,21 @@ class CpuConnection(EngineConnection):
 
 class CpuDataset(EngineDataset):
 
+    _prefetch_depth = 4
+
+    def _iter_chunks_prefetched(self):
+        # keep a small read-ahead window in flight so the next chunks
+        # travel the network while func crunches the current one; a
+        # no-op for backends without prefetch support
+        pending = deque()
+        for idx in self.iter_chunk_indices_tiled():
+            self.prefetch_chunk_data(idx)
+            pending.append(idx)
+            if len(pending) > self._prefetch_depth:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
     def get_chunk(self, idx):
         chunk = self.instance.get_chunk(idx)
         return CpuDataChunk(chunk)
@@ -42,15 +57,39 @@ class CpuDataset(EngineDataset):
     def get_data(self, slices=None):
         log.debug("getting data at %s[%s]", self.name, slices)
         slices, squeeze_axis = self._process_slices(slices, squeeze=True)
-        tshape = tuple(x.stop - x.start for x in slices)
+
+        read_into = getattr(self.instance, 'read_into', None)
+        if read_into is not None:
+            # backends with a bulk read path (batched AIO on ceph, a
+            # single backing-array copy on ram) fill the whole buffer
+            # themselves; integer axes are dropped afterwards
+            tshape = tuple(x.stop - x.start for x in slices)
+            output = read_into(np.empty(tshape, dtype=self.dtype), slices)
+            if squeeze_axis:
+                output = output.squeeze(axis=tuple(squeeze_axis))
+            return output
+
         chunk_iterator = self._chunk_slice_iterator(slices, self.ndim)
 
+        # allocate the output at its final squeezed shape instead of
+        # squeezing a copy afterwards; integer axes never make it into
+        # the buffer at all
+        tshape = tuple(x.stop - x.start for index, x in enumerate(slices)
+                       if index not in squeeze_axis)
         output = np.empty(tshape, dtype=self.dtype)
-        for idx, cslice, gslice in chunk_iterator:
-            output[gslice] = self.get_chunk_data(idx, slices=cslice)
 
-        if squeeze_axis:
-            return np.squeeze(output, axis=squeeze_axis)
+        if not squeeze_axis:
+            for idx, cslice, gslice in chunk_iterator:
+                output[gslice] = self.get_chunk_data(idx, slices=cslice)
+            return output
+
+        squeeze_axis = set(squeeze_axis)
+        for idx, cslice, gslice in chunk_iterator:
+            gslice = tuple(g for index, g in enumerate(gslice)
+                           if index not in squeeze_axis)
+            region = tuple(g.stop - g.start for g in gslice)
+            output[gslice] = self.get_chunk_data(idx,
+                                                 slices=cslice).reshape(region)
         return output
 
     def set_data(self, values, slices=None):
@@ -70,30 +109,26 @@ class CpuDataset(EngineDataset):
                 self.set_chunk_data(idx, values[gslice], slices=cslice)
 
     def clear(self):
-        for idx in range(self.total_chunks):
-            idx = self._idx_from_flat(idx)
+        for idx in self.iter_chunk_indices():
             self.del_chunk(idx)
 
     def load(self, data):
         if data.shape != self.shape:
             raise Exception('Data shape does not match')
-        for idx in range(self.total_chunks):
-            idx = self._idx_from_flat(idx)
+        for idx in self.iter_chunk_indices_tiled():
             gslices = self._global_chunk_bounds(idx)
             lslices = self._local_chunk_bounds(idx)
             self.set_chunk_data(idx, data[gslices], slices=lslices)
 
     def map(self, func, output_name):
         out = self.clone(output_name)
-        for idx in range(self.total_chunks):
-            idx = self._idx_from_flat(idx)
+        for idx in self._iter_chunks_prefetched():
             data = func(self.get_chunk_data(idx))
             out.set_chunk_data(idx, data)
         return out
 
     def apply(self, func):
-        for idx in range(self.total_chunks):
-            idx = self._idx_from_flat(idx)
+        for idx in self._iter_chunks_prefetched():
             data = func(self.get_chunk_data(idx))
             self.set_chunk_data(idx, data)
 
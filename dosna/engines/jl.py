@@ -4,6 +4,7 @@ functions"""
 
 import logging
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 from joblib import Parallel, delayed, dump, load
@@ -12,7 +13,6 @@ from dosna.backends import get_backend
 from dosna.engines import Engine
 from dosna.engines.base import EngineConnection, EngineDataChunk
 from dosna.engines.cpu import CpuDataset
-from six.moves import range
 
 log = logging.getLogger(__name__)
 
@@ -45,6 +45,34 @@ class JoblibDataset(CpuDataset):
         super(JoblibDataset, self).__init__(ds)
         self.njobs = njobs
         self.jlbackend = jlbackend
+        self._executor = None
+
+    @property
+    def executor(self):
+        # persistent pool for the threading backend; building a new
+        # Parallel() per call re-spawns workers every time
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.njobs)
+        return self._executor
+
+    def _run_parallel(self, func, args_iterator):
+        if self.jlbackend == 'threading':
+            futures = [self.executor.submit(func, self, *args)
+                       for args in args_iterator]
+            for future in futures:
+                future.result()
+        else:
+            Parallel(n_jobs=self.njobs, backend=self.jlbackend)(
+                delayed(func)(self, *args) for args in args_iterator
+            )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __del__(self):
+        self.close()
 
     def get_chunk(self, idx):
         chunk = self.instance.get_chunk(idx)
@@ -62,21 +90,35 @@ class JoblibDataset(CpuDataset):
 
     def get_data(self, slices=None):
         slices, squeeze_axis = self._process_slices(slices, squeeze=True)
-        tshape = tuple(x.stop - x.start for x in slices)
-        chunk_iterator = self._chunk_slice_iterator(slices, self.ndim)
-
-        with tempfile.NamedTemporaryFile() as file_handle:
-            output = self._make_temporary_memmap(file_handle.name,
-                                                 shape=tshape)
-            Parallel(n_jobs=self.njobs, backend=self.jlbackend)(
-                delayed(_get_chunk_data_joblib)(self, idx, cslice, gslice,
-                                                output)
-                for idx, cslice, gslice in chunk_iterator
-            )
-            output = np.asarray(output)
+        # the output is allocated at its final squeezed shape, so the
+        # integer axes are dropped from each chunk's global slice here
+        tshape = tuple(x.stop - x.start for index, x in enumerate(slices)
+                       if index not in squeeze_axis)
+        squeeze_axis = set(squeeze_axis)
+        chunk_iterator = (
+            (idx, cslice, tuple(g for index, g in enumerate(gslice)
+                                if index not in squeeze_axis))
+            for idx, cslice, gslice in
+            self._chunk_slice_iterator(slices, self.ndim))
+
+        if self.jlbackend == 'threading':
+            # threads share memory: write disjoint regions of a plain
+            # array concurrently, no temporary file needed
+            output = np.empty(tshape, dtype=self.dtype)
+            self._run_parallel(_get_chunk_data_joblib,
+                               ((idx, cslice, gslice, output)
+                                for idx, cslice, gslice in chunk_iterator))
+        else:
+            with tempfile.NamedTemporaryFile() as file_handle:
+                output = self._make_temporary_memmap(file_handle.name,
+                                                     shape=tshape)
+                Parallel(n_jobs=self.njobs, backend=self.jlbackend)(
+                    delayed(_get_chunk_data_joblib)(self, idx, cslice, gslice,
+                                                    output)
+                    for idx, cslice, gslice in chunk_iterator
+                )
+                output = np.asarray(output)
 
-        if squeeze_axis:
-            return np.squeeze(output, axis=squeeze_axis)
         return output
 
     def set_data(self, values, slices=None):
@@ -86,21 +128,26 @@ class JoblibDataset(CpuDataset):
         slices, _ = self._process_slices(slices, squeeze=True)
         chunk_iterator = self._chunk_slice_iterator(slices, ndim)
 
-        Parallel(n_jobs=self.njobs, backend=self.jlbackend)(
-            delayed(_set_chunk_data_joblib)(self, idx, cslice, gslice, values)
-            for idx, cslice, gslice in chunk_iterator
-        )
+        self._run_parallel(_set_chunk_data_joblib,
+                           ((idx, cslice, gslice, values)
+                            for idx, cslice, gslice in chunk_iterator))
 
     def clear(self):
-        Parallel(n_jobs=self.njobs, backend=self.jlbackend)(
-            delayed(_delete_chunk)(self, idx)
-            for idx in range(self.total_chunks)
-        )
+        self._run_parallel(_delete_chunk,
+                           ((idx,) for idx in range(self.total_chunks)))
 
     def load(self, data):
         if data.shape != self.shape:
             raise Exception('Data shape does not match')
 
+        if self.jlbackend == 'threading':
+            # the source array is already visible to every thread; the
+            # dump/load dance would write it to disk and read it back
+            self._run_parallel(_populate_dataset_joblib,
+                               ((idx, data)
+                                for idx in range(self.total_chunks)))
+            return
+
         with tempfile.NamedTemporaryFile() as file_handle:
             dinput = self._make_temporary_memmap(file_handle.name, data=data)
             Parallel(n_jobs=self.njobs, backend=self.jlbackend)(
@@ -110,17 +157,15 @@ class JoblibDataset(CpuDataset):
 
     def map(self, func, output_name):
         out = self.clone(output_name)
-        Parallel(n_jobs=self.njobs, backend=self.jlbackend)(
-            delayed(_map_function_chunk)(self, idx, out, func)
-            for idx in range(self.total_chunks)
-        )
+        self._run_parallel(_map_function_chunk,
+                           ((idx, out, func)
+                            for idx in range(self.total_chunks)))
         return out
 
     def apply(self, func):
-        Parallel(n_jobs=self.njobs, backend=self.jlbackend)(
-            delayed(_apply_function_chunk)(self, idx, func)
-            for idx in range(self.total_chunks)
-        )
+        self._run_parallel(_apply_function_chunk,
+                           ((idx, func)
+                            for idx in range(self.total_chunks)))
 
     def clone(self, output_name):
         out = self.instance.connection.create_dataset(
@@ -154,7 +199,9 @@ def _apply_function_chunk(inst, idx, func):
 
 
 def _get_chunk_data_joblib(inst, chunk_idx, cslice, gslice, doutput):
-    doutput[gslice] = inst.get_chunk_data(chunk_idx, slices=cslice)
+    region = tuple(g.stop - g.start for g in gslice)
+    doutput[gslice] = inst.get_chunk_data(chunk_idx,
+                                          slices=cslice).reshape(region)
 
 
 def _set_chunk_data_joblib(inst, chunk_idx, cslice, gslice, dinput):
@@ -12,7 +12,6 @@ from dosna.engines import Engine
 from dosna.engines.base import EngineConnection, EngineDataChunk
 from dosna.engines.cpu import CpuDataset
 from dosna.util.mpi import MpiMixin
-from six.moves import range
 
 log = logging.getLogger(__name__)
 
@@ -12,9 +12,9 @@ cdef extern from "clovis_functions.h":
     int init_clovis(char * laddr, char * ha_addr, char * prof_id,
                     char * proc_fid, size_t block_size, unsigned int tier)
     int write_object(uint64_t high_id, uint64_t low_id,
-                     char *buffer, size_t length)
+                     char *buffer, size_t length) nogil
     int read_object(uint64_t high_id, uint64_t low_id, char *buffer,
-                    size_t length)
+                    size_t length) nogil
     int exist_object(uint64_t high_id, uint64_t low_id)
     int create_object(uint64_t high_id, uint64_t low_id)
     int delete_object(uint64_t high_id, uint64_t low_id)
@@ -196,7 +196,10 @@ class Clovis:
             int rc
 
         self._check_connected()
-        rc = write_object(high_id, low_id, buffer, length)
+        # drop the GIL while the transfer blocks so threaded engines
+        # can overlap chunk writes
+        with nogil:
+            rc = write_object(high_id, low_id, buffer, length)
         if rc != 0:
             raise Exception("Error {} while writing object".format(rc))
 
@@ -210,7 +213,10 @@ class Clovis:
         self._check_connected()
         buffer_bytes = PyBytes_FromStringAndSize(NULL, length)
         buffer = PyBytes_AsString(buffer_bytes)
-        rc = read_object(high_id, low_id, buffer, length)
+        # drop the GIL while the transfer blocks so threaded engines
+        # can overlap chunk reads
+        with nogil:
+            rc = read_object(high_id, low_id, buffer, length)
         if rc != 0:
             raise Exception("Error {} while reading object".format(rc))
         return <object> buffer_bytes
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+import logging
+import unittest
+
+import numpy as np
+
+from dosna.tests import configure_logger
+from dosna.util.data import contiguous_slice_range
+
+log = logging.getLogger(__name__)
+
+
+class ContiguousSliceRangeTest(unittest.TestCase):
+    """
+    Test the C-contiguity detection that gates the ranged read and
+    write fast paths of the object-store backends
+    """
+
+    def assert_span_matches_numpy(self, slices, shape):
+        span = contiguous_slice_range(slices, shape)
+        self.assertIsNotNone(span)
+        start, count, tshape = span
+        data = np.arange(int(np.prod(shape))).reshape(shape)
+        expected = data[slices]
+        result = data.reshape(-1)[start:start + count].reshape(tshape)
+        self.assertEqual(tshape, expected.shape)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_full_selection(self):
+        shape = (4, 5, 6)
+        slices = tuple(slice(0, size) for size in shape)
+        self.assert_span_matches_numpy(slices, shape)
+
+    def test_partial_leading_axis(self):
+        self.assert_span_matches_numpy((slice(1, 3), slice(0, 5)), (4, 5))
+
+    def test_single_elements_then_full_axes(self):
+        self.assert_span_matches_numpy(
+            (slice(2, 3), slice(1, 2), slice(0, 6)), (4, 5, 6))
+
+    def test_single_row_run(self):
+        self.assert_span_matches_numpy(
+            (slice(1, 2), slice(2, 5)), (4, 5))
+
+    def test_one_dimension(self):
+        self.assert_span_matches_numpy((slice(3, 9),), (10,))
+
+    def test_non_contiguous_returns_none(self):
+        # a partial inner axis under a multi-element outer axis selects
+        # several disjoint runs
+        self.assertIsNone(
+            contiguous_slice_range((slice(0, 2), slice(1, 3)), (4, 5)))
+        self.assertIsNone(
+            contiguous_slice_range((slice(0, 4), slice(0, 2), slice(0, 6)),
+                                   (4, 5, 6)))
+
+    def test_unnormalized_slices_return_none(self):
+        self.assertIsNone(
+            contiguous_slice_range((slice(None), slice(0, 5)), (4, 5)))
+        self.assertIsNone(
+            contiguous_slice_range((slice(0, 4, 2), slice(0, 5)), (4, 5)))
+        self.assertIsNone(contiguous_slice_range((slice(0, 4),), (4, 5)))
+
+    def test_matches_numpy_fuzz(self):
+        # any span the helper reports must select exactly the elements
+        # numpy selects, across 1-4 dimensional shapes
+        rand = np.random.RandomState(1234)
+        detected = 0
+        for _ in range(500):
+            ndim = rand.randint(1, 5)
+            shape = tuple(rand.randint(1, 7) for _ in range(ndim))
+            slices = []
+            for size in shape:
+                start = rand.randint(0, size)
+                stop = rand.randint(start + 1, size + 1)
+                slices.append(slice(start, stop))
+            slices = tuple(slices)
+            if contiguous_slice_range(slices, shape) is not None:
+                detected += 1
+                self.assert_span_matches_numpy(slices, shape)
+        self.assertGreater(detected, 0)
+
+
+def main():
+    configure_logger(log)
+    unittest.main(verbosity=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,13 @@ import numpy as np
 log = logging.getLogger(__name__)
 
 
+def ceildiv(numerator, denominator):
+    # integer ceiling division, avoids the float round-trip of np.ceil
+    numerator = np.asarray(numerator, dtype=int)
+    denominator = np.asarray(denominator, dtype=int)
+    return (numerator + denominator - 1) // denominator
+
+
 def shape2str(dims, sep='::'):
     return sep.join(map(str, dims))
 
@@ -42,11 +49,18 @@ class Timer(object):
 
 class DirectoryTreeMixin(object):
 
+    _path = None
+
     @property
     def path(self):
-        if getattr(self, "directory", False):
-            return join(self.directory, self.name)
-        return self.parent.relpath(self.name)
+        # name, parent and directory never change, so the path is
+        # computed once and shares the parent's cached prefix
+        if self._path is None:
+            if getattr(self, "directory", False):
+                self._path = join(self.directory, self.name)
+            else:
+                self._path = self.parent.relpath(self.name)
+        return self._path
 
     def relpath(self, name=''):
         return join(self.path, name)
@@ -3,6 +3,49 @@
 Helper functions to manage data and metadata
 """
 
+import numpy as np
+
+
+def fill_array(shape, fillvalue, dtype):
+    # np.zeros goes through calloc, so zero-filled chunks cost no
+    # physical memory until they are actually written
+    if fillvalue == 0:
+        return np.zeros(shape, dtype)
+    return np.full(shape, fillvalue, dtype)
+
+
+def contiguous_slice_range(slices, shape):
+    """
+    If `slices` (a tuple of start/stop slices covering `shape`) selects
+    a C-contiguous run of elements, return its (start, count, shape) in
+    element units; otherwise return None.
+    """
+    if len(slices) != len(shape):
+        return None
+    for slice_ in slices:
+        if not isinstance(slice_, slice) or slice_.start is None \
+                or slice_.stop is None or slice_.step not in (None, 1):
+            return None
+    # the run is contiguous when every axis after the last partial one
+    # is selected in full and every axis before it is a single element
+    last = len(shape) - 1
+    while last >= 0 and slices[last].start == 0 \
+            and slices[last].stop == shape[last]:
+        last -= 1
+    for index in range(last):
+        if slices[index].stop - slices[index].start != 1:
+            return None
+    start = 0
+    count = 1
+    stride = 1
+    tshape = []
+    for slice_, size in zip(reversed(slices), reversed(shape)):
+        start += slice_.start * stride
+        count *= slice_.stop - slice_.start
+        stride *= size
+        tshape.append(slice_.stop - slice_.start)
+    return int(start), int(count), tuple(reversed(tshape))
+
 
 def slices2shape(slices):
     result = []
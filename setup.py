@@ -16,7 +16,7 @@ setup(
     },
     packages=find_packages() + ['dosna'],
     python_requires=">=2.7.0",
-    install_requires=["numpy>=1.13.0", "six>=1.10.0"],
+    install_requires=["numpy>=1.13.0"],
     extras_require={
         "hdf5": ["h5py>=2.7.0"],
         "jl": ["joblib>=0.11"],